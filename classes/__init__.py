@@ -7,25 +7,33 @@ File containing the classes used in my splitwise implementation.
 3. DebtList
 4. GroupDebtList
 5. TransactionLog
+6. TransactionStore
+7. Settlement
+8. MemberPayments
 
 ### Convention
 
 Person has to get money = +ve debt for person who has to get, -ve for person who has to give. We add to the debt to the A if he pays for B, and subtract from the debt of B. Add to a[b], and subtract from b[a] simultaneously.
 
-The icecream module is used for debugging, and it runs the debug statements if an env variable "DEBUG" is set to true.
+The icecream module is used for debugging, and it runs the debug statements if an env variable "DEBUG" is set to true when the module is imported.
 """
 from __future__ import annotations
 
-from typing import Optional
+from array import array
+from collections import Counter, defaultdict
+from collections.abc import Iterable, Iterator, Mapping
+from heapq import heapify, heappop, heappush
+from itertools import count
+from types import MappingProxyType
+from typing import NamedTuple, Optional
 from uuid import uuid4
+from weakref import WeakSet
 
 from colorama import Fore
 
+import miscellaneous
 from miscellaneous import *
 
-# from icecream import ic  # type: ignore
-
-
 env_default_currency_prefix: str | None = getenv("PREFERRED_CURRENCY")
 
 default_currency_prefix: str
@@ -36,40 +44,66 @@ else:
     default_currency_prefix = "₹"
 
 
+_ID_PREFIX: dict[str, str] = {
+    "transaction": "tr-",
+    "member": "mb-",
+    "group": "gr-",
+    "dlist": "dl-",
+    "group-dlist": "gd-",
+}
+
+_PROCESS_ID: str = uuid4().hex
+_ID_COUNTER: count[int] = count()
+
+# Colour codes used while printing, looked up on `Fore` only once.
+_GREEN: str = Fore.GREEN
+_RED: str = Fore.RED
+_RESET: str = Fore.RESET
+
+# Prefixes of the lines printed for every member in a debt list report.
+_PLUS_PREFIX: str = f"\n     {_GREEN}++ {_RESET}"
+_MINUS_PREFIX: str = f"\n     {_RED}-- {_RESET}"
+
+# Groups with at most these many members in debt are settled optimally, the search is exponential in this number.
+_OPTIMAL_SETTLEMENT_MAX_MEMBERS: int = 12
+
+
 def generate_uniq_id(type: str = "transaction") -> str:
     """
-    Generate a random UUID (using UUID.uuid4()) and add a prefix to the string representation of the UUID based on what the UUID it is being generated for.
+    Generate a unique ID and add a prefix to it based on what the ID is being generated for.
+
+    The ID is made of a random UUID (using UUID.uuid4()) generated once per process, followed by a counter that is incremented on every call. IDs are hence unique within a process (and very unlikely to collide across processes), without reading from the OS's random source for every object.
 
-    Eg: If type is 'member', it adds the prefix 'mb' to the uuid and returns it.
+    Eg: If type is 'member', it adds the prefix 'mb-' to the ID and returns it. Any other type gets the prefix 'ot-'.
 
     #### Parameters:
         `type`: 'transaction' | 'member' | 'group' | 'dlist' | 'group-dlist' | Any string
     """
-
-    if type.casefold() == "transaction":
-        return "tr-" + str(uuid4())
-    elif type.casefold() == "member":
-        return "mb-" + str(uuid4())
-    elif type.casefold() == "group":
-        return "gr-" + str(uuid4())
-    elif type.casefold() == "dlist":
-        return "dl-" + str(uuid4())
-    elif type.casefold() == "group-dlist":
-        return "gd-" + str(uuid4())
-    return "ot-" + str(uuid4())
+    # All callers pass lowercase literals, so only casefold when the exact lookup misses.
+    prefix: str = _ID_PREFIX.get(type) or _ID_PREFIX.get(type.casefold(), "ot-")
+    return f"{prefix}{_PROCESS_ID}-{next(_ID_COUNTER):x}"
+
+
+def print_transactions(transactions: Iterable[TransactionLog]) -> None:
+    """Prints a list of `TransactionLog` objects in the order they were made, with an arrow between consecutive transactions."""
+    # arrow = """   ----
+    # |
+    # |
+    # ---
+    # """
+    arrow = """
+            |
+            ↓\n"""
+    print(arrow.join(map(str, transactions)))
 
 
 def determine_currency_prefix(members: list[Member] | tuple[Member, ...]) -> str:
     """Calculates a currency prefix when given a list/tuple of `Member` objects, based on what the most frequent currency prefix is among all members is."""
-    preferred_currencies: list[str] = [
+    if not members:
+        return default_currency_prefix
+    return Counter(
         member.preferred_currency_prefix_member for member in members
-    ]
-    preferred_currency_prefix_group: str
-    if preferred_currencies:
-        preferred_currency_prefix_group = max(preferred_currencies)
-    else:
-        preferred_currency_prefix_group = default_currency_prefix
-    return preferred_currency_prefix_group
+    ).most_common(1)[0][0]
 
 
 class TransactionLog:
@@ -82,8 +116,18 @@ class TransactionLog:
         `currency_prefix`: The currency the transaction was made in.
     If the Transaction was made in a group of the type `SplitwiseGroup`, then a group argument can also be provided.
         `group` - The SplitwiseGroup object in which the transaction was made.
+    A `unique_id` can be passed to reuse an existing ID, else a new one is generated.
     """
 
+    __slots__ = (
+        "debited_from",
+        "credited_to",
+        "amount",
+        "currency",
+        "group",
+        "unique_id",
+    )
+
     def __init__(
         self,
         debited_from: Member,
@@ -91,53 +135,128 @@ class TransactionLog:
         amount: int = 0,
         currency_prefix: str = default_currency_prefix,
         group: Optional[SplitwiseGroup] = None,
-        previous_transaction: Optional[TransactionLog] = None,
+        unique_id: Optional[str] = None,
     ):
         self.debited_from: Member = debited_from
         self.credited_to: Member = credited_to
         self.amount: int = amount
         self.currency: str = currency_prefix
-        self.group = Optional[SplitwiseGroup]
-        if group:
-            self.group = group
-        else:
-            self.group = None
-        self.prev: Optional[TransactionLog] = previous_transaction
-        self.next: Optional[TransactionLog] = None
+        self.group: Optional[SplitwiseGroup] = group
 
-        self.unique_id: str = generate_uniq_id("transaction")
+        self.unique_id: str = unique_id or generate_uniq_id("transaction")
 
     def __str__(self) -> str:
-        string_repr = (
-            f'{repr(self.debited_from)} paid {self.currency}{self.amount} to {repr(self.credited_to)} in the group "{self.group}."'
-            if self.group
-            else f"{repr(self.debited_from)} paid {self.currency}{self.amount} to {repr(self.credited_to)}"
-        )
+        string_repr = f"{self.debited_from!r} paid {self.currency}{self.amount} to {self.credited_to!r}"
+        if self.group:
+            return f'{string_repr} in the group "{self.group}."'
         return string_repr
 
     def __repr__(self) -> str:
         return self.unique_id
 
-    def recursive_print(self) -> None:
-        # arrow = """   ----
-        # |
-        # |
-        # ---
-        # """
-        arrow = """
-            |
-            ↓\n"""
-        _ = self.next
-        while _:
-            print(
-                _,
-                end=arrow,
+
+class TransactionStore:
+    """
+    The transaction history of a `Member` or a `SplitwiseGroup`, stored column-wise instead of as one `TransactionLog` object per transaction.
+
+    Every transaction is a row across four columns: the index of the member who paid, the index of the member who got paid (both into `self.members`), the amount, and the index of its currency into `self.currencies`. The index columns are compact arrays of machine integers. The amounts are kept in a plain list, since an amount can be a float or an int too large for a machine integer. `TransactionLog` objects are built only when the history is read, with an ID derived from the store's ID and the row number so it stays the same on every read.
+    #### Parameters
+        `group`: The SplitwiseGroup object the transactions were made in, if any.
+    """
+
+    __slots__ = (
+        "group",
+        "members",
+        "_member_index",
+        "currencies",
+        "_currency_index",
+        "debited",
+        "credited",
+        "amounts",
+        "currency_ids",
+        "uniq_id_store",
+    )
+
+    def __init__(self, group: Optional[SplitwiseGroup] = None):
+        self.group: Optional[SplitwiseGroup] = group
+        self.members: list[Member] = []
+        self._member_index: dict[Member, int] = {}
+        self.currencies: list[str] = []
+        self._currency_index: dict[str, int] = {}
+        self.debited: array[int] = array("I")
+        self.credited: array[int] = array("I")
+        self.amounts: list[int] = []
+        self.currency_ids: array[int] = array("I")
+        self.uniq_id_store: str = generate_uniq_id("transaction")
+
+    def _index_of_member(self, member: Member) -> int:
+        index: Optional[int] = self._member_index.get(member)
+        if index is None:
+            index = self._member_index[member] = len(self.members)
+            self.members.append(member)
+        return index
+
+    def _index_of_currency(self, currency_prefix: str) -> int:
+        index: Optional[int] = self._currency_index.get(currency_prefix)
+        if index is None:
+            index = self._currency_index[currency_prefix] = len(self.currencies)
+            self.currencies.append(currency_prefix)
+        return index
+
+    def append(
+        self,
+        debited_from: Member,
+        credited_to: Member,
+        amount: int,
+        currency_prefix: str = default_currency_prefix,
+    ) -> None:
+        """Records a transaction where `debited_from` paid `amount` to `credited_to`."""
+        self.debited.append(self._index_of_member(debited_from))
+        self.credited.append(self._index_of_member(credited_to))
+        self.amounts.append(amount)
+        self.currency_ids.append(self._index_of_currency(currency_prefix))
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    def __getitem__(self, index: int) -> TransactionLog:
+        """Builds the `TransactionLog` of the transaction at `index`. Negative indexes count from the end, slices are not supported."""
+        if not isinstance(index, int):
+            raise TypeError(
+                f"TransactionStore indices must be integers, not {type(index).__name__}"
             )
-            if _.next:
-                _ = _.next
-            else:
-                break
-        print(_)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("TransactionStore index out of range")
+        return TransactionLog(
+            self.members[self.debited[index]],
+            self.members[self.credited[index]],
+            self.amounts[index],
+            self.currencies[self.currency_ids[index]],
+            self.group,
+            f"{self.uniq_id_store}-{index:x}",
+        )
+
+    def __iter__(self) -> Iterator[TransactionLog]:
+        for index in range(len(self)):
+            yield self[index]
+
+
+class Settlement(NamedTuple):
+    """
+    A single payment needed to settle the debts of a group, as returned by `GroupDebtList.calculate_settlements()`. It is a plain tuple, since settlements are only read while printing and never need an ID or a place in a transaction history like a `TransactionLog`.
+    #### Parameters
+        `debited_from`: An object of the `Member` class, who has to pay.
+        `credited_to`: An object of the `Member` class, who gets paid.
+        `amount`: The amount to be paid.
+        `currency`: The currency the amount is in.
+    """
+
+    debited_from: Member
+    credited_to: Member
+    amount: int
+    currency: str = default_currency_prefix
 
 
 class DebtList:
@@ -150,6 +269,14 @@ class DebtList:
         `preferred_currency_prefix`: The preffered currency prefix for all the transactions in the debt list.
     """
 
+    __slots__ = (
+        "name",
+        "parent_member",
+        "debt_list",
+        "uniq_id_debt_list",
+        "preferred_currency_prefix_debt_list",
+    )
+
     def __init__(
         self,
         name: str,
@@ -160,45 +287,48 @@ class DebtList:
     ):
         self.name: str = name
         self.parent_member: Member = parent_member
-        self.debt_list: dict[Member, int] = dict()
+        self.debt_list: dict[Member, int] = defaultdict(
+            int, dict.fromkeys(members, default_amount)
+        )
         self.uniq_id_debt_list: str = generate_uniq_id(type="dlist")
         self.preferred_currency_prefix_debt_list: str = preferred_currency_prefix
 
-        for member in members:
-            self.debt_list[member] = default_amount
-
     def update(self, person_self_paid_to: Member, amount: int = 0):
         """
         This value will be set as default if the self Member object does not have the person he owes money to in his debt list. If self pays for someone else, the debt in his debt list will increase positively.
 
         Eg: Debtlist[B]=600 means B owes 600.
+
+        Paying nothing, or paying yourself, does not change any debt and is ignored.
         """
-        if person_self_paid_to in self.debt_list:
-            self.debt_list[person_self_paid_to] += amount
-        else:
-            self.debt_list[person_self_paid_to] = amount
+        if amount == 0 or person_self_paid_to is self.parent_member:
+            return
+        self.debt_list[person_self_paid_to] += amount
 
     def __str__(self) -> str:
         """String representation of a debt list, useful for printing it."""
         if not self.debt_list:
-            return f"{self} doesn't have debts."
-        string_repr: str = ""
+            return f"{self!r} doesn't have debts."
+        string_parts: list[str] = [f"Debt list for {self.parent_member} is:"]
         net_debt: int = 0
-        string_repr += f"Debt list for {self.parent_member} is:"
-        for member in self.debt_list:
-            if self.debt_list[member] > 0:
-                net_debt += self.debt_list[member]
-                string_repr += f"\n     {Fore.GREEN}++ {Fore.RESET}{self.debt_list[member]} from {member}"
-            elif self.debt_list[member] < 0:
-                net_debt += self.debt_list[member]
-                string_repr += f"\n     {Fore.RED}-- {Fore.RESET}{-self.debt_list[member]} to {member}"
+        for member, debt in self.debt_list.items():
+            if debt > 0:
+                net_debt += debt
+                string_parts.append(f"{_PLUS_PREFIX}{debt} from {member}")
+            elif debt < 0:
+                net_debt += debt
+                string_parts.append(f"{_MINUS_PREFIX}{-debt} to {member}")
         if net_debt > 0:
-            string_repr += f"\n   {self.parent_member} gets back {net_debt} in total."
+            string_parts.append(
+                f"\n   {self.parent_member} gets back {net_debt} in total."
+            )
         elif net_debt < 0:
-            string_repr += f"\n   {self.parent_member} owes {-net_debt} in total."
+            string_parts.append(f"\n   {self.parent_member} owes {-net_debt} in total.")
         else:
-            string_repr += f"\n   {self.parent_member} has a net debt is 0. Congrats!"
-        return string_repr
+            string_parts.append(
+                f"\n   {self.parent_member} has a net debt is 0. Congrats!"
+            )
+        return "".join(string_parts)
 
     def __repr__(self) -> str:
         return self.name
@@ -214,122 +344,323 @@ class GroupDebtList:
         `preferred_currency_prefix`: The preffered currency prefix for all the transactions in the debt list.
     """
 
+    __slots__ = (
+        "name",
+        "parent_group",
+        "debt_list",
+        "_debt_list",
+        "amount_in_group",
+        "group_transactions",
+        "uniq_id_group_debt_list",
+        "preferred_currency_prefix",
+        "_debtors",
+        "_creditors",
+        "_heap_seq",
+        "_heap_counter",
+        "_owes_money",
+        "_gets_money",
+        "_no_debt",
+        "_settlements_cache",
+    )
+
     def __init__(
         self,
         name: str,
         parent_group: SplitwiseGroup,
-        members: list[Member] | tuple[Member] = [],
+        members: list[Member] | tuple[Member, ...] = (),
         default_amount: int = 0,
         preferred_currency_prefix: str = default_currency_prefix,
     ):
         self.name: str = name
         self.parent_group: SplitwiseGroup = parent_group
-        self.debt_list: dict[Member, int] = dict()
+        # A plain dict rather than a defaultdict, since its keys are the members of the group and a lookup must never add one.
+        self._debt_list: dict[Member, int] = dict.fromkeys(members, default_amount)
+        # The owes/gets/no-debt partitions, the heaps and the settlements cache are all kept in sync with the debt list by update() and add_members(), so it is only exposed as a read-only view.
+        self.debt_list: Mapping[Member, int] = MappingProxyType(self._debt_list)
         self.amount_in_group: int = default_amount
-        for member in members:
-            self.debt_list[member] = default_amount
         self.group_transactions: list[TransactionLog] = []
         self.uniq_id_group_debt_list: str = generate_uniq_id(type="group-dlist")
         self.preferred_currency_prefix: str = preferred_currency_prefix
 
+        # Members split by the sign of their debt, kept up to date by update() so get_dicts_of_debts() does not have to rescan the debt list.
+        self._owes_money: dict[Member, int] = {}
+        self._gets_money: dict[Member, int] = {}
+        self._no_debt: dict[Member, int] = {}
+        for member, debt in self._debt_list.items():
+            self._partition_for(debt)[member] = debt
+
+        # Heaps of (balance, seq, member) kept up to date by update(), so calculate_settlements() does not have to rebuild them. A heap entry is stale once the member's latest seq in self._heap_seq has moved past it.
+        self._debtors: list[tuple[int, int, Member]] = []
+        self._creditors: list[tuple[int, int, Member]] = []
+        self._heap_seq: dict[Member, int] = {}
+        self._heap_counter: count[int] = count()
+        self._rebuild_heaps()
+
+        # (currency, settlements) of the last calculate_settlements() call, cleared by any change to the debt list.
+        self._settlements_cache: Optional[tuple[str, list[Settlement]]] = None
+
+    def _rebuild_heaps(self) -> None:
+        """Rebuilds the debtor and creditor heaps from `self._debt_list`, dropping all stale entries."""
+        self._debtors = []
+        self._creditors = []
+        self._heap_seq = {}
+        for person, debt in self._debt_list.items():
+            seq = next(self._heap_counter)
+            self._heap_seq[person] = seq
+            if debt < 0:
+                self._debtors.append((debt, seq, person))
+            elif debt > 0:
+                self._creditors.append((-debt, seq, person))
+        heapify(self._debtors)
+        heapify(self._creditors)
+
+    def _partition_for(self, debt: int) -> dict[Member, int]:
+        """Returns the partition (owes money, gets money or no debt) a member with a debt of `debt` belongs to."""
+        if debt < 0:
+            return self._owes_money
+        elif debt > 0:
+            return self._gets_money
+        return self._no_debt
+
+    def _set_debt(self, person: Member, debt: int) -> None:
+        """Sets the debt of `person`, moving them to the matching partition and pushing the new balance onto the heaps."""
+        self._settlements_cache = None
+        self._partition_for(self._debt_list[person]).pop(person, None)
+        self._debt_list[person] = debt
+        self._partition_for(debt)[person] = debt
+        self._push_balance(person)
+
+    def _push_balance(self, person: Member) -> None:
+        """Pushes the current balance of `person` onto the matching heap, making any older entry of theirs stale. The heaps are rebuilt once stale entries outnumber the members, so they stay O(members) however many transactions are made."""
+        debt = self._debt_list[person]
+        seq = next(self._heap_counter)
+        self._heap_seq[person] = seq
+        if debt < 0:
+            heappush(self._debtors, (debt, seq, person))
+        elif debt > 0:
+            heappush(self._creditors, (-debt, seq, person))
+        if len(self._debtors) + len(self._creditors) > 2 * len(self._debt_list):
+            self._rebuild_heaps()
+
     def update(
         self, person_who_paid: Member, person_who_got_the_money: Member, amount: int = 0
     ):
+        if amount == 0 or person_who_paid is person_who_got_the_money:
+            return
+        # Both debts are read first, so a member who is not in the group raises a KeyError before anything is changed.
+        paid_debt: int = self._debt_list[person_who_paid]
+        got_debt: int = self._debt_list[person_who_got_the_money]
         self.amount_in_group += amount
-        self.debt_list.update()
-        self.debt_list[person_who_paid] += amount
-        self.debt_list[person_who_got_the_money] -= amount
+        self._set_debt(person_who_paid, paid_debt + amount)
+        self._set_debt(person_who_got_the_money, got_debt - amount)
 
-    def get_dicts_of_debts(self) -> tuple[dict[Member, int], ...]:
-        owes_money: dict[Member, int] = {
-            person: self.debt_list[person]
-            for person in self.debt_list
-            if self.debt_list[person] < 0
-        }
-        gets_money: dict[Member, int] = {
-            person: self.debt_list[person]
-            for person in self.debt_list
-            if self.debt_list[person] > 0
+    def add_members(self, members: list[Member]) -> None:
+        """Adds `members` to the debt list with no debt. Members already in the debt list are left as they are."""
+        new_members: dict[Member, int] = {
+            member: 0 for member in members if member not in self._debt_list
         }
-        no_debt: dict[Member, int] = {
-            person: self.debt_list[person]
-            for person in self.debt_list
-            if self.debt_list[person] == 0
-        }
-        return (owes_money, gets_money, no_debt)
-
-    def calculate_settlements(self) -> list[TransactionLog]:
-        if self.debt_list:
-            (owes_money, gets_money, no_debt) = self.get_dicts_of_debts()
-
-            max_owed: int = min(owes_money.values())
-            max_owed_person: Member = [
-                person for person in owes_money if owes_money[person] == max_owed
-            ][0]
-
-            max_gets: int = max(gets_money.values())
-            max_gets_person: Member = [
-                person for person in gets_money if gets_money[person] == max_gets
-            ][0]
-            transactions_needed_to_settle: list[TransactionLog] = []
-
-            while max_owed < 0 and max_gets > 0:
-                # When comparing max_gets and max_owed to decide how to redistribute the debts, you need to compare
-                if max_gets >= -max_owed:
-                    amount = -max_owed
-                else:
-                    amount = max_gets
+        self._debt_list.update(new_members)
+        self._no_debt.update(new_members)
+        self._settlements_cache = None
+
+    def get_dicts_of_debts(self) -> tuple[dict[Member, int], ...]:
+        """Returns copies of the dicts of members who owe money, members who get money and members with no debt. The split is maintained by `update()`, so this does not rescan the debt list."""
+        return (dict(self._owes_money), dict(self._gets_money), dict(self._no_debt))
+
+    def calculate_settlements(
+        self, currency_prefix: Optional[str] = None
+    ) -> list[Settlement]:
+        """
+        Greedily pairs the member who owes the most with the member who gets back the most, until all debts are settled.
 
-                transactions_needed_to_settle.append(
-                    TransactionLog(max_owed_person, max_gets_person, amount)
+        Debtors are kept in a min-heap (most negative first) and creditors in a max-heap (stored negated), so every settlement is O(log n) instead of a rescan of the whole debt list. Both heaps are maintained by `update()`, which also rebuilds them once stale entries outnumber the members, so this only copies them and skips stale entries while popping. A sequence number breaks ties so `Member` objects are never compared.
+
+        Since `self.debt_list` only holds the net balance of every member, debt cycles (A owes B, B owes C, C owes A) are already cancelled out by `update()` and never need to be detected here. Every settlement clears at least one member, so at most n - 1 transactions are returned.
+
+        The greedy pairing can miss a subset of members whose debts cancel out among themselves, so for small groups the result is checked against `_fewest_settlements()` and replaced if that needs fewer transactions. Since that check is exponential in the number of members in debt, the result is cached until the debt list changes.
+        #### Parameters
+            `currency_prefix`: The currency prefix of the returned settlements. Defaults to the preferred currency prefix of the parent group, since that is what the group's transactions are made in.
+        """
+        if self._debt_list:
+            currency: str = (
+                currency_prefix or self.parent_group.preferred_currency_prefix_group
+            )
+            if (
+                self._settlements_cache is not None
+                and self._settlements_cache[0] == currency
+            ):
+                return list(self._settlements_cache[1])
+
+            debtors: list[tuple[int, int, Member]] = self._debtors.copy()
+            creditors: list[tuple[int, int, Member]] = self._creditors.copy()
+            # Latest seq of the residual balances pushed while settling, which take precedence over self._heap_seq.
+            settling_seq: dict[Member, int] = {}
+            heap_seq: dict[Member, int] = self._heap_seq
+
+            settlements: list[Settlement] = []
+
+            debug: bool = miscellaneous._DEBUG
+            if debug:
+                from icecream import ic  # type: ignore
+
+            while True:
+                while debtors and debtors[0][1] != settling_seq.get(
+                    debtors[0][2], heap_seq[debtors[0][2]]
+                ):
+                    heappop(debtors)
+                while creditors and creditors[0][1] != settling_seq.get(
+                    creditors[0][2], heap_seq[creditors[0][2]]
+                ):
+                    heappop(creditors)
+                if not (debtors and creditors):
+                    break
+
+                max_owed, _, max_owed_person = heappop(debtors)
+                negated_max_gets, _, max_gets_person = heappop(creditors)
+                max_gets = -negated_max_gets
+
+                amount = min(max_gets, -max_owed)
+
+                settlements.append(
+                    Settlement(max_owed_person, max_gets_person, amount, currency)
                 )
-                owes_money[max_owed_person] += amount
-                gets_money[max_gets_person] -= amount
-
-                max_owed = min(owes_money.values())
-                max_owed_person = [
-                    person for person in owes_money if owes_money[person] == max_owed
-                ][0]
-
-                max_gets = max(gets_money.values())
-                max_gets_person = [
-                    person for person in gets_money if gets_money[person] == max_gets
-                ][0]
-                # if str(getenv("DEBUG")).casefold() not in ("false", "no", "none", ""):
-                # ic( owes_money,gets_money,max_gets,max_owed,)
-            return transactions_needed_to_settle
+
+                if max_owed + amount < 0:
+                    seq = next(self._heap_counter)
+                    settling_seq[max_owed_person] = seq
+                    heappush(debtors, (max_owed + amount, seq, max_owed_person))
+                if max_gets - amount > 0:
+                    seq = next(self._heap_counter)
+                    settling_seq[max_gets_person] = seq
+                    heappush(creditors, (-(max_gets - amount), seq, max_gets_person))
+                if debug:
+                    ic(debtors, creditors, max_gets, max_owed)
+
+            if (
+                len(settlements) > 2
+                and len(self._owes_money) + len(self._gets_money)
+                <= _OPTIMAL_SETTLEMENT_MAX_MEMBERS
+            ):
+                fewest_settlements = self._fewest_settlements(currency)
+                if len(fewest_settlements) < len(settlements):
+                    settlements = fewest_settlements
+            self._settlements_cache = (currency, settlements)
+            return list(settlements)
 
         else:
-            log_and_print(f"{self} group debt list does not have any members")
+            log_and_print(
+                "%s group debt list does not have any members",
+                args=(self.parent_group.name,),
+            )
             return []
 
+    def _fewest_settlements(self, currency: str) -> list[Settlement]:
+        """
+        Finds the fewest settlements needed to clear all debts, by splitting the members in debt into as many subsets whose debts add up to zero as possible. Each subset of k members is then settled with k - 1 transactions, so n members split into g subsets need n - g transactions.
+
+        `max_subsets[mask]` is the most zero-sum subsets the members in the bitmask `mask` can be split into, which is the best over dropping any one member, plus one if `mask` itself adds up to zero. This takes O(2^n * n) time and memory, so it is only used on groups with at most `_OPTIMAL_SETTLEMENT_MAX_MEMBERS` members in debt.
+        """
+        balances: dict[Member, int] = {**self._owes_money, **self._gets_money}
+        members: list[Member] = list(balances)
+        full_mask: int = (1 << len(members)) - 1
+
+        sums: list[int] = [0] * (full_mask + 1)
+        max_subsets: list[int] = [0] * (full_mask + 1)
+        for mask in range(1, full_mask + 1):
+            lowest_bit = mask & -mask
+            sums[mask] = (
+                sums[mask ^ lowest_bit] + balances[members[lowest_bit.bit_length() - 1]]
+            )
+            max_subsets[mask] = max(
+                max_subsets[mask ^ (1 << i)]
+                for i in range(len(members))
+                if mask >> i & 1
+            ) + (sums[mask] == 0)
+
+        # Walk back from all members, cutting off a zero-sum subset every time the remaining members add up to zero.
+        subsets: list[list[Member]] = []
+        subset: list[Member] = []
+        mask = full_mask
+        while mask:
+            target = max_subsets[mask] - (sums[mask] == 0)
+            i = next(
+                i
+                for i in range(len(members))
+                if mask >> i & 1 and max_subsets[mask ^ (1 << i)] == target
+            )
+            subset.append(members[i])
+            mask ^= 1 << i
+            if sums[mask] == 0:
+                subsets.append(subset)
+                subset = []
+        if subset:
+            subsets.append(subset)
+
+        settlements: list[Settlement] = []
+        for subset in subsets:
+            debtors: list[tuple[int, int, Member]] = []
+            creditors: list[tuple[int, int, Member]] = []
+            for seq, person in enumerate(subset):
+                if balances[person] < 0:
+                    debtors.append((balances[person], seq, person))
+                else:
+                    creditors.append((-balances[person], seq, person))
+            heapify(debtors)
+            heapify(creditors)
+            while debtors and creditors:
+                owed, debtor_seq, debtor = heappop(debtors)
+                negated_gets, creditor_seq, creditor = heappop(creditors)
+                amount = min(-negated_gets, -owed)
+                settlements.append(Settlement(debtor, creditor, amount, currency))
+                if owed + amount < 0:
+                    heappush(debtors, (owed + amount, debtor_seq, debtor))
+                if -negated_gets - amount > 0:
+                    heappush(creditors, (negated_gets + amount, creditor_seq, creditor))
+        return settlements
+
     def __str__(self) -> str:
         """String representation of a debt list, useful for printing it."""
-        if not self.debt_list:
-            return f"{self} doesn't have a debt list."
-        string_repr: str = ""
+        if not self._debt_list:
+            return f"{self!r} doesn't have a debt list."
+        string_parts: list[str] = [f"Debt list for {self!r} is:"]
         net_debt: int = 0
-        string_repr += f"Debt list for {self} is:"
-        for member in self.debt_list:
-            if self.debt_list[member] > 0:
-                net_debt += self.debt_list[member]
-                string_repr += f"\n     {Fore.GREEN}++ {Fore.RESET}{self.debt_list[member]} from {member}"
-            elif self.debt_list[member] < 0:
-                net_debt += self.debt_list[member]
-                string_repr += f"\n     {Fore.RED}-- {Fore.RESET}{-self.debt_list[member]} to {member}"
+        for member, debt in self._debt_list.items():
+            if debt > 0:
+                net_debt += debt
+                string_parts.append(f"{_PLUS_PREFIX}{debt} from {member}")
+            elif debt < 0:
+                net_debt += debt
+                string_parts.append(f"{_MINUS_PREFIX}{-debt} to {member}")
         if net_debt > 0:
-            string_repr += f"\n   {self.parent_group} gets back {net_debt} in total."
+            string_parts.append(
+                f"\n   {self.parent_group} gets back {net_debt} in total."
+            )
         elif net_debt < 0:
-            string_repr += f"\n   {self} owes {-net_debt} in total."
+            string_parts.append(f"\n   {self!r} owes {-net_debt} in total.")
         else:
-            string_repr += f"\n   {self} has a net debt is 0. Congrats!"
-        return string_repr
+            string_parts.append(f"\n   {self!r} has a net debt is 0. Congrats!")
+        return "".join(string_parts)
 
     def __repr__(self) -> str:
         return self.name
 
 
 class Member:
+    __slots__ = (
+        "name",
+        "uniq_id_member",
+        "preferred_currency_prefix_member",
+        "groups",
+        "debt_list",
+        "transactions",
+        "upi_id",
+        "__weakref__",
+    )
+
+    # Members are compared and hashed by identity, which keeps every debt_list lookup a pointer hash. Do not override __eq__ based on the name.
+    __hash__ = object.__hash__
+    __eq__ = object.__eq__
+
     def __init__(
         self,
         name: str,
@@ -339,14 +670,14 @@ class Member:
         self.name: str = name
         self.uniq_id_member: str = generate_uniq_id(type="member")
         self.preferred_currency_prefix_member: str = preferred_currency_prefix
-        self.groups: set[SplitwiseGroup] = set()
+        # Groups are only referenced weakly, so a member does not keep the groups they were part of alive.
+        self.groups: WeakSet[SplitwiseGroup] = WeakSet()
         self.debt_list: DebtList = DebtList(
             name="DebtList" + "-" + self.name,
             parent_member=self,
             preferred_currency_prefix=self.preferred_currency_prefix_member,
         )
-        self.first_non_group_transaction: Optional[TransactionLog] = None
-        self.last_non_group_transaction: TransactionLog
+        self.transactions: TransactionStore = TransactionStore()
         self.upi_id: Optional[str] = upi_id
 
     def non_group_transaction(
@@ -355,30 +686,23 @@ class Member:
         amount: int = 0,
         changed_in_other_person_object: bool = False,
     ):
-        self.debt_list.update(person_who_was_given_money, amount)
-        if not self.first_non_group_transaction:
-            self.first_non_group_transaction = TransactionLog(
-                self,
-                person_who_was_given_money,
-                amount,
-                self.preferred_currency_prefix_member,
-                None,
-            )
-            self.last_non_group_transaction = self.first_non_group_transaction
-        _ = TransactionLog(
+        if amount == 0 or person_who_was_given_money is self:
+            return
+        self.transactions.append(
             self,
             person_who_was_given_money,
             amount,
             self.preferred_currency_prefix_member,
-            previous_transaction=self.last_non_group_transaction,
         )
-
-        self.last_non_group_transaction.next = _
-        self.last_non_group_transaction = _
+        self.debt_list.update(person_who_was_given_money, amount)
 
         if not changed_in_other_person_object:
             person_who_was_given_money.non_group_transaction(self, -amount, True)
 
+    def recursive_print(self) -> None:
+        """Prints all the non-group transactions of this member, oldest first."""
+        print_transactions(self.transactions)
+
     def __str__(self) -> str:
         return self.name
 
@@ -386,8 +710,78 @@ class Member:
         return str(self)
 
 
+class MemberPayments:
+    """
+    A class used to calculate and represent the settlements needed to be done in a group.
+    #### Paremeters:
+        `settlements`: A list of `Settlement` objects.
+        `preferred_currency`: The currency prefix the amounts are shown in, usually the group's preferred currency prefix.
+    """
+
+    def __init__(
+        self,
+        settlements: list[Settlement],
+        preferred_currency: str = default_currency_prefix,
+    ):
+        self.members: list[Member] = []
+        self.member_payments: dict[Member, dict[Member, int]] = {}
+        self.preferred_currency: str = preferred_currency
+        if settlements:
+            self.members = [transaction.credited_to for transaction in settlements] + [
+                transaction.debited_from for transaction in settlements
+            ]
+
+            self.member_payments = {member: {} for member in self.members}
+
+            for transaction in settlements:
+                # print(f"    {transaction.debited_from.name} owes {transaction.currency}{transaction.amount} to {transaction.credited_to.name}")
+                self.member_payments[transaction.credited_to][
+                    transaction.debited_from
+                ] = transaction.amount
+                self.member_payments[transaction.debited_from][
+                    transaction.credited_to
+                ] = -transaction.amount
+
+    def __str__(self) -> str:
+        currency: str = self.preferred_currency
+        string_parts: list[str] = []
+
+        for member, payments in self.member_payments.items():
+            total: int = sum(payments.values())
+            if total > 0:
+                string_parts.append(
+                    f"\n{member} gets {_GREEN}{currency}{total}{_RESET}\n"
+                )
+            else:
+                string_parts.append(
+                    f"\n{member} owes {_RED}{currency}{total}{_RESET}\n"
+                )
+            for other_member, amount in payments.items():
+                if amount > 0:
+                    string_parts.append(
+                        f"  {_GREEN}++ {currency}{amount}{_RESET} from {other_member}\n"
+                    )
+                else:
+                    string_parts.append(
+                        f"  {_RED}-- {currency}{-amount}{_RESET} to {other_member}\n"
+                    )
+        return "".join(string_parts)
+
+
 class SplitwiseGroup:
-    def __init__(self, name: str, members: list[Member] | tuple[Member, ...] = []):
+    __slots__ = (
+        "name",
+        "uniq_id_group",
+        "members",
+        "group_debts_list",
+        "transactions",
+        "_preferred_currency_prefix_group",
+        "_prefix_dirty",
+        "_prefix_override",
+        "__weakref__",
+    )
+
+    def __init__(self, name: str, members: list[Member] | tuple[Member, ...] = ()):
         self.name: str = name
         self.uniq_id_group: str = generate_uniq_id(type="group")
         self.members: list[Member] = list(members)
@@ -398,24 +792,59 @@ class SplitwiseGroup:
         )
         for member in self.members:
             member.groups.add(self)
-        self.first_non_group_transaction: Optional[TransactionLog] = None
-        self.last_non_group_transaction: TransactionLog
-        self.preferred_currency_prefix_group = determine_currency_prefix(self.members)
+        self.transactions: TransactionStore = TransactionStore(group=self)
+        self._preferred_currency_prefix_group: str = default_currency_prefix
+        self._prefix_dirty: bool = True
+        self._prefix_override: Optional[str] = None
+
+    @property
+    def preferred_currency_prefix_group(self) -> str:
+        """The most frequent currency prefix among the members of the group. It is cached, and only recomputed after members are added. Once it is set explicitly, the set value is used instead, even after members are added."""
+        if self._prefix_override is not None:
+            return self._prefix_override
+        if self._prefix_dirty:
+            self._preferred_currency_prefix_group = determine_currency_prefix(
+                self.members
+            )
+            self._prefix_dirty = False
+        return self._preferred_currency_prefix_group
 
-    def add_member(self, person: Member | list[Member] | tuple[Member, ...]):
+    @preferred_currency_prefix_group.setter
+    def preferred_currency_prefix_group(self, currency_prefix: str) -> None:
+        self._prefix_override = currency_prefix
+
+    def add_member(self, person: Member | Iterable[Member]):
         """
-        Add a `Member` or a list/tuple of `Member` objects as additional members to the `SplitwiseGroup`.
+        Add a `Member` or an iterable (list/tuple/set/...) of `Member` objects as additional members to the `SplitwiseGroup`.
         #### Parameters:
-            `person`: Member | list[Member] | tuple[Member, ...]
+            `person`: Member | Iterable[Member]
+
+        New members start with no debt in the group. Members who are already in the group are skipped, so their debts are left as they are.
         """
-        if isinstance(person, Member):
-            self.members.append(person)
-        elif isinstance(person, (list, tuple)):
-            self.members += list(person)
-        else:
+        # Every element is checked before anything is changed, so invalid input (including a str, which is an iterable of characters) leaves the group as it was.
+        people: tuple[Member, ...] = (
+            tuple(person)
+            if isinstance(person, Iterable) and not isinstance(person, str)
+            else (person,)
+        )
+        if not all(isinstance(member, Member) for member in people):
             log_and_print(
-                "Can add only members from a list, tuple when given a single Member object."
+                "Can add only a single Member object, or Member objects from a list, tuple or any other iterable."
             )
+            return
+
+        debt_list: Mapping[Member, int] = self.group_debts_list.debt_list
+        new_members: list[Member] = [
+            member for member in dict.fromkeys(people) if member not in debt_list
+        ]
+        if not new_members:
+            return
+
+        self.members.extend(new_members)
+        self.group_debts_list.add_members(new_members)
+        for member in new_members:
+            member.groups.add(self)
+        self._prefix_dirty = True
 
     def transaction(
         self,
@@ -429,40 +858,18 @@ class SplitwiseGroup:
             `member_who_gave_money`: The person who lent the money.
             `member_who_received_money`: The person who received the money.
             `amount`: The amount involved in this transaction (preferably should be positive, but should also work with negative)
-        """
-        if not self.first_non_group_transaction:
-            self.first_non_group_transaction = TransactionLog(
-                member_who_gave_money,
-                member_who_received_money,
-                amount,
-                self.preferred_currency_prefix_group,
-                self,
-                None,
-            )
-            self.last_non_group_transaction = self.first_non_group_transaction
-        _ = TransactionLog(
-            member_who_gave_money,
-            member_who_received_money,
-            amount,
-            self.preferred_currency_prefix_group,
-            self,
-            self.last_non_group_transaction,
-        )
 
-        self.last_non_group_transaction.next = _
-        self.last_non_group_transaction = _
+        A transaction involving someone who is not in the group is not recorded, and returns `False`. Between members of the group, a transaction of 0, or one where a member pays themselves, is not recorded either and returns `True`.
+        """
+        # The group debt list holds exactly the members of the group, so it doubles as an O(1) membership check.
+        debt_list: Mapping[Member, int] = self.group_debts_list.debt_list
         if (
-            member_who_gave_money in self.members
-            and member_who_received_money in self.members
+            member_who_gave_money not in debt_list
+            or member_who_received_money not in debt_list
         ):
-            self.group_debts_list.update(
-                member_who_gave_money, member_who_received_money, amount
-            )
-            return True
-        else:
             non_member = (
                 member_who_received_money
-                if member_who_received_money not in self.members
+                if member_who_received_money not in debt_list
                 else member_who_gave_money
             )
             other_member = (
@@ -471,67 +878,42 @@ class SplitwiseGroup:
                 else member_who_received_money
             )
             log_and_print(
-                f'{non_member} is not in the spltiwise group. Please make a transaction between {non_member} and {other_member} outside of this group "{self}", or add {non_member} to this group.'
+                '%s is not in the spltiwise group. Please make a transaction between %s and %s outside of this group "%s", or add %s to this group.',
+                args=(non_member, non_member, other_member, self, non_member),
             )
             return False
 
+        if amount == 0 or member_who_gave_money is member_who_received_money:
+            return True
+        self.transactions.append(
+            member_who_gave_money,
+            member_who_received_money,
+            amount,
+            self.preferred_currency_prefix_group,
+        )
+        self.group_debts_list.update(
+            member_who_gave_money, member_who_received_money, amount
+        )
+        return True
+
+    def recursive_print(self) -> None:
+        """Prints all the transactions made in this group, oldest first."""
+        print_transactions(self.transactions)
+
     def get_settlements(self) -> None:
         """
         Prints a way to settle all debts by showing how members can pay each other, similar to a format used by Splitwise. It calculates money lent and owed by calling the `calculate_settlements()` function `self.group_debts`, a GroupDebtList, and then for each Transaction that is part of the possible settlement, it formats it in a way similar to users of Splitwise and then prints it.
 
-        This function also contains a member_payments class that handles all formating and calculation while printing.
+        The `MemberPayments` class handles all formating and calculation while printing.
         """
-        settlements: list[
-            TransactionLog
-        ] = self.group_debts_list.calculate_settlements()
-
-        class MemberPayments:
-            """
-            A class used to calculate and represent the settlements needed to be done in a group.
-            #### Paremeters:
-                `settlements`: A list of `TransactionLog` objects.
-            """
-
-            def __init__(self, settlements: list[TransactionLog]):
-                if settlements:
-                    self.members: list[Member] = [
-                        transaction.credited_to for transaction in settlements
-                    ] + [transaction.debited_from for transaction in settlements]
-
-                    self.member_payments: dict[Member, dict[Member, int]] = {
-                        member: {} for member in self.members
-                    }
-
-                    for transaction in settlements:
-                        # print(f"    {transaction.debited_from.name} owes {transaction.currency}{transaction.amount} to {transaction.credited_to.name}")
-                        self.member_payments[transaction.credited_to][
-                            transaction.debited_from
-                        ] = transaction.amount
-                        self.member_payments[transaction.debited_from][
-                            transaction.credited_to
-                        ] = -transaction.amount
-                    self.preferred_currency: str = determine_currency_prefix(
-                        self.members
-                    )
-
-            def __str__(self) -> str:
-                string_repr: str = ""
-
-                for member in self.member_payments:
-                    if sum(self.member_payments[member].values()) > 0:
-                        string_repr += f"\n{member} gets {Fore.GREEN}{self.preferred_currency}{sum(self.member_payments[member].values())}{Fore.RESET}\n"
-                    else:
-                        string_repr += f"\n{member} owes {Fore.RED}{self.preferred_currency}{sum(self.member_payments[member].values())}{Fore.RESET}\n"
-                    for _ in self.member_payments[member]:
-                        if self.member_payments[member][_] > 0:
-                            string_repr += f"  {Fore.GREEN}++ {self.preferred_currency}{self.member_payments[member][_]}{Fore.RESET} from {_}\n"
-                        else:
-                            string_repr += f"  {Fore.RED}-- {self.preferred_currency}{-self.member_payments[member][_]}{Fore.RESET} to {_}\n"
-                return string_repr
+        currency: str = self.preferred_currency_prefix_group
+        settlements: list[Settlement] = self.group_debts_list.calculate_settlements(
+            currency
+        )
 
         print(
             f'The settlements to clear all debts in the group "{self}" are:\n'
-            + str(MemberPayments(settlements))
+            + str(MemberPayments(settlements, currency))
         )
 
     def __str__(self) -> str:
@@ -1,6 +1,6 @@
 import logging
 from os import getenv
-from typing import Optional
+from typing import Callable
 
 from dotenv import load_dotenv
 
@@ -9,36 +9,78 @@ load_dotenv("splitwise.env")
 
 logger = logging.getLogger("splitwise")
 
-logging.basicConfig(
-    format="%(asctime)s %(message)s",
-    filename="splitwise.log",
-    encoding="utf-8",
-    level=logging.DEBUG,
-)
+_logging_configured: bool = False
 
 
-def log_and_print(msg: str, level: str = "warn") -> None:
+def _configure_logging() -> None:
+    """Sets up logging to `splitwise.log`. It only runs once, and only when a log is kept, so the log file is not opened otherwise."""
+    global _logging_configured
+    if not _logging_configured:
+        logging.basicConfig(
+            format="%(asctime)s %(message)s",
+            filename="splitwise.log",
+            encoding="utf-8",
+            level=logging.DEBUG,
+        )
+        _logging_configured = True
+
+
+# Env variables are read once at import (and by refresh_env()), instead of on every call that depends on them.
+_FALSEY: frozenset[str] = frozenset({"false", "no", "none", ""})
+
+_KEEP_LOG: bool
+_DEBUG: bool
+_PRINT: bool
+
+
+def refresh_env() -> None:
+    """
+    Reads the env variables `KEEP_A_LOG`, `DEBUG` and `QUIET` again and caches their values.
+
+    This runs once at import. Call it again only if these env variables are changed at runtime, like in tests.
+    """
+    global _KEEP_LOG, _DEBUG, _PRINT
+    _KEEP_LOG = str(getenv("KEEP_A_LOG")).casefold() not in _FALSEY
+    _DEBUG = str(getenv("DEBUG")).casefold() not in _FALSEY
+    _PRINT = str(getenv("QUIET")).casefold() in _FALSEY
+    if _KEEP_LOG:
+        _configure_logging()
+
+
+refresh_env()
+
+_LEVEL_DISPATCH: dict[str, Callable[[str], None]] = {
+    "warn": logger.warning,
+    "critical": logger.critical,
+    "info": logger.info,
+}
+
+
+def log_and_print(
+    msg: str, level: str = "warn", *, args: tuple[object, ...] = ()
+) -> None:
     """
     This function can be used for printing an error message, as well as for logging it by passing the level to the level parameter.
 
-    This function looks for the env variable `KEEP_A_LOG`, to check whether it should keep logs to the file.
+    `msg` can be a %-style format string, with its arguments passed as a tuple in the keyword-only `args`. It is only formatted if the message is going to be printed or logged.
 
-    Printing always happens, irrespective of the value of `KEEP_A_LOG`.
+    This function looks at the env variable `KEEP_A_LOG` (read once at import), to check whether it should keep logs to the file.
+
+    Printing happens irrespective of the value of `KEEP_A_LOG`, unless the env variable `QUIET` is set to true.
 
     #### Parameters
         `msg` - The message to print/log.
-        `
+        `level` - 'warn' | 'critical' | 'info' | Any other string logs at debug level.
+        `args` - Arguments to format `msg` with, if any.
     """
-    print(msg)
-
-    log_to_file: Optional[str] = getenv("KEEP_A_LOG")
-
-    if str(log_to_file).casefold() not in ("false", "no", "none"):
-        if level == "warn":
-            logger.warning(msg)
-        elif level == "critical":
-            logger.critical(msg)
-        elif level == "info":
-            logger.info(msg)
-        else:
-            logger.debug(msg)
+    if not (_PRINT or _KEEP_LOG):
+        return
+
+    if args:
+        msg = msg % args
+
+    if _PRINT:
+        print(msg)
+
+    if _KEEP_LOG:
+        _LEVEL_DISPATCH.get(level, logger.debug)(msg)
@@ -30,6 +30,6 @@ group.transaction(v, x, random.randint(1, 1000))
 group.transaction(x, j, random.randint(1, 1000))
 
 
-if group.first_non_group_transaction:
-    group.first_non_group_transaction.recursive_print()
+if group.transactions:
+    group.recursive_print()
     print(group.get_settlements())
@@ -0,0 +1,166 @@
+import random
+import unittest
+from collections.abc import Iterator
+from unittest.mock import patch
+
+from classes import GroupDebtList, Member, SplitwiseGroup
+
+
+def set_partitions(items: list) -> Iterator[list[list]]:
+    """Yields every way of splitting `items` into non-empty blocks."""
+    if not items:
+        yield []
+        return
+    first, rest = items[0], items[1:]
+    for partition in set_partitions(rest):
+        yield [[first], *partition]
+        for i in range(len(partition)):
+            yield [*partition[:i], [first, *partition[i]], *partition[i + 1 :]]
+
+
+def brute_force_fewest_settlements(balances: list[int]) -> int:
+    """The fewest transfers needed to clear `balances`, found by trying every split of the members in debt into zero-sum blocks."""
+    in_debt: list[int] = [balance for balance in balances if balance]
+    return len(in_debt) - max(
+        (
+            len(partition)
+            for partition in set_partitions(in_debt)
+            if all(sum(block) == 0 for block in partition)
+        ),
+        default=0,
+    )
+
+
+def random_group(rng: random.Random, size: int) -> SplitwiseGroup:
+    members: list[Member] = [Member(f"m{i}") for i in range(size)]
+    group = SplitwiseGroup("g", members)
+    for _ in range(rng.randint(1, 3 * size)):
+        paid, got = rng.sample(members, 2)
+        group.transaction(paid, got, rng.choice([1, 2, 3, 5, 8, 13]))
+    return group
+
+
+class SettlementInvariantsTest(unittest.TestCase):
+    def test_settlements_clear_all_debts(self):
+        rng = random.Random(1)
+        for _ in range(300):
+            group = random_group(rng, rng.randint(2, 15))
+            debts = group.group_debts_list
+            balances: dict[Member, int] = dict(debts.debt_list)
+            settlements = debts.calculate_settlements()
+
+            in_debt = sum(1 for balance in balances.values() if balance)
+            self.assertLessEqual(len(settlements), max(in_debt - 1, 0))
+            for settlement in settlements:
+                self.assertGreater(settlement.amount, 0)
+                balances[settlement.debited_from] += settlement.amount
+                balances[settlement.credited_to] -= settlement.amount
+            self.assertFalse(any(balances.values()))
+
+    def test_settling_does_not_change_the_debt_list(self):
+        group = random_group(random.Random(2), 6)
+        debts = group.group_debts_list
+        before = dict(debts.debt_list)
+        debts.calculate_settlements()
+        self.assertEqual(debts.debt_list, before)
+
+    def test_settlements_use_the_group_currency(self):
+        a, b = members = [Member(name, "$") for name in "ab"]
+        group = SplitwiseGroup("g", members)
+        group.transaction(a, b, 5)
+        debts = group.group_debts_list
+        self.assertEqual(
+            [settlement.currency for settlement in debts.calculate_settlements()],
+            ["$"],
+        )
+        self.assertEqual(
+            [settlement.currency for settlement in debts.calculate_settlements("€")],
+            ["€"],
+        )
+
+    def test_set_group_currency_is_used(self):
+        a, b = members = [Member(name, "$") for name in "ab"]
+        group = SplitwiseGroup("g", members)
+        group.preferred_currency_prefix_group = "€"
+        group.add_member(Member("c", "$"))
+        group.transaction(a, b, 5)
+        self.assertEqual(group.preferred_currency_prefix_group, "€")
+        self.assertEqual(
+            [
+                settlement.currency
+                for settlement in group.group_debts_list.calculate_settlements()
+            ],
+            ["€"],
+        )
+
+    def test_debt_list_is_read_only(self):
+        a, b = members = [Member(name) for name in "ab"]
+        group = SplitwiseGroup("g", members)
+        group.transaction(a, b, 5)
+        with self.assertRaises(TypeError):
+            group.group_debts_list.debt_list[a] = 0
+        self.assertEqual(group.group_debts_list.debt_list, {a: 5, b: -5})
+
+    def test_heaps_stay_bounded_by_the_members(self):
+        rng = random.Random(3)
+        members: list[Member] = [Member(f"m{i}") for i in range(5)]
+        group = SplitwiseGroup("g", members)
+        for _ in range(10_000):
+            paid, got = rng.sample(members, 2)
+            group.transaction(paid, got, rng.randint(1, 9))
+        debts = group.group_debts_list
+        self.assertLessEqual(
+            len(debts._debtors) + len(debts._creditors), 2 * len(members)
+        )
+
+
+class FewestSettlementsTest(unittest.TestCase):
+    def test_matches_brute_force_minimum(self):
+        rng = random.Random(0)
+        for _ in range(300):
+            group = random_group(rng, rng.randint(2, 7))
+            debts = group.group_debts_list
+            settlements = debts.calculate_settlements()
+            self.assertEqual(
+                len(settlements),
+                brute_force_fewest_settlements(list(debts.debt_list.values())),
+            )
+
+    def test_finds_zero_sum_subsets_missed_by_greedy(self):
+        a, b, c, d, e = members = [Member(name) for name in "abcde"]
+        group = SplitwiseGroup("g", members)
+        # {a, b, d} and {c, e} both cancel out, but greedy pairs the largest creditor b with the largest debtor c and needs 4 transfers.
+        group.transaction(b, a, 8)
+        group.transaction(b, d, 5)
+        group.transaction(e, c, 11)
+        self.assertEqual(len(group.group_debts_list.calculate_settlements()), 3)
+
+    def test_result_is_cached_until_the_debts_change(self):
+        a, b, c, d, e = members = [Member(name) for name in "abcde"]
+        group = SplitwiseGroup("g", members)
+        group.transaction(b, a, 8)
+        group.transaction(b, d, 5)
+        group.transaction(e, c, 11)
+        debts = group.group_debts_list
+
+        with patch.object(
+            GroupDebtList,
+            "_fewest_settlements",
+            autospec=True,
+            side_effect=GroupDebtList._fewest_settlements,
+        ) as fewest_settlements:
+            first = debts.calculate_settlements()
+            self.assertEqual(fewest_settlements.call_count, 1)
+            self.assertEqual(debts.calculate_settlements(), first)
+            self.assertEqual(fewest_settlements.call_count, 1)
+
+            debts.calculate_settlements("$")
+            self.assertEqual(fewest_settlements.call_count, 2)
+
+            group.transaction(a, b, 1)
+            debts.calculate_settlements("$")
+            self.assertEqual(fewest_settlements.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
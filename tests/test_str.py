@@ -0,0 +1,65 @@
+import unittest
+
+from colorama import Fore
+
+from classes import Member, MemberPayments, SplitwiseGroup
+
+
+class StrGoldenTest(unittest.TestCase):
+    """Pins the printed output, so refactors of the string building can be checked against it."""
+
+    def setUp(self):
+        self.a, self.b, self.c = Member("a"), Member("b"), Member("c")
+
+    def test_transaction_log(self):
+        self.a.non_group_transaction(self.b, 5)
+        self.assertEqual(str(self.a.transactions[0]), "a paid ₹5 to b")
+
+        group = SplitwiseGroup("trip", [self.a, self.b])
+        group.transaction(self.a, self.b, 4)
+        self.assertEqual(
+            str(group.transactions[0]), 'a paid ₹4 to b in the group "trip."'
+        )
+
+    def test_debt_list(self):
+        self.a.non_group_transaction(self.b, 5)
+        self.assertEqual(
+            str(self.a.debt_list),
+            f"Debt list for a is:\n     {Fore.GREEN}++ {Fore.RESET}5 from b\n   a gets back 5 in total.",
+        )
+
+    def test_group_debt_list(self):
+        group = SplitwiseGroup("trip", [self.a, self.b, self.c])
+        group.transaction(self.a, self.b, 10)
+        group.transaction(self.c, self.b, 4)
+        self.assertEqual(
+            str(group.group_debts_list),
+            "Debt list for GroupDebtList-trip is:"
+            f"\n     {Fore.GREEN}++ {Fore.RESET}10 from a"
+            f"\n     {Fore.RED}-- {Fore.RESET}14 to b"
+            f"\n     {Fore.GREEN}++ {Fore.RESET}4 from c"
+            "\n   GroupDebtList-trip has a net debt is 0. Congrats!",
+        )
+
+    def test_member_payments(self):
+        group = SplitwiseGroup("trip", [self.a, self.b, self.c])
+        group.transaction(self.a, self.b, 10)
+        group.transaction(self.c, self.b, 4)
+        payments = MemberPayments(group.group_debts_list.calculate_settlements(), "$")
+        self.assertEqual(
+            str(payments),
+            f"\na gets {Fore.GREEN}$10{Fore.RESET}\n"
+            f"  {Fore.GREEN}++ $10{Fore.RESET} from b\n"
+            f"\nc gets {Fore.GREEN}$4{Fore.RESET}\n"
+            f"  {Fore.GREEN}++ $4{Fore.RESET} from b\n"
+            f"\nb owes {Fore.RED}$-14{Fore.RESET}\n"
+            f"  {Fore.RED}-- $10{Fore.RESET} to a\n"
+            f"  {Fore.RED}-- $4{Fore.RESET} to c\n",
+        )
+
+    def test_empty_member_payments(self):
+        self.assertEqual(str(MemberPayments([])), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+from classes import Member, SplitwiseGroup, TransactionStore
+
+
+class TransactionStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.a, self.b = Member("a"), Member("b")
+        self.store = TransactionStore()
+        self.store.append(self.a, self.b, 5, "₹")
+        self.store.append(self.b, self.a, 2.5, "$")
+        self.store.append(self.a, self.b, 2**70, "₹")
+
+    def test_round_trip(self):
+        self.assertEqual(len(self.store), 3)
+        self.assertEqual(
+            [(t.debited_from, t.credited_to, t.amount, t.currency) for t in self.store],
+            [
+                (self.a, self.b, 5, "₹"),
+                (self.b, self.a, 2.5, "$"),
+                (self.a, self.b, 2**70, "₹"),
+            ],
+        )
+
+    def test_ids_are_stable_and_unique(self):
+        ids = [t.unique_id for t in self.store]
+        self.assertEqual(ids, [t.unique_id for t in self.store])
+        self.assertEqual(len(set(ids)), 3)
+
+    def test_negative_index(self):
+        self.assertEqual(self.store[-1].unique_id, self.store[2].unique_id)
+        self.assertEqual(self.store[-3].unique_id, self.store[0].unique_id)
+
+    def test_out_of_range_index(self):
+        for index in (3, -4):
+            with self.assertRaises(IndexError):
+                self.store[index]
+
+    def test_non_int_index(self):
+        for index in (slice(0, 1), "0", 1.0):
+            with self.assertRaises(TypeError):
+                self.store[index]
+
+    def test_group_transactions(self):
+        group = SplitwiseGroup("trip", [self.a, self.b])
+        group.transaction(self.a, self.b, 5)
+        self.assertIs(group.transactions[0].group, group)
+
+
+if __name__ == "__main__":
+    unittest.main()